@@ -1,76 +1,709 @@
+import asyncio
 import ctypes
+import functools
+import logging
+import os
+import threading
 import time
-import wmi
-from winotify import Notification, audio
+from ctypes import wintypes
+
+logging.basicConfig(
+    level=os.environ.get("BATWATCH_LOG", "INFO"),
+    format="%(asctime)s %(message)s",
+)
+log = logging.getLogger("battery_watcher")
 
 # Configuration
 CHECK_INTERVAL = 180  # 3 minutes in seconds
+MIN_CHECK_INTERVAL = 30  # bounds for the adaptive polling interval
+MAX_CHECK_INTERVAL = 900
 LOW_BATTERY_THRESHOLD = 50
 FULL_BATTERY_THRESHOLD = 100
 
-# Initialize Windows-specific components - but only when not in test mode
-wmi_connection = None
+class SYSTEM_POWER_STATUS(ctypes.Structure):
+    """Mirrors the SYSTEM_POWER_STATUS struct filled by GetSystemPowerStatus"""
+    _fields_ = [
+        ("ACLineStatus", ctypes.c_ubyte),
+        ("BatteryFlag", ctypes.c_ubyte),
+        ("BatteryLifePercent", ctypes.c_ubyte),
+        ("SystemStatusFlag", ctypes.c_ubyte),
+        ("BatteryLifeTime", wintypes.DWORD),
+        ("BatteryFullLifeTime", wintypes.DWORD),
+    ]
+
+GetSystemPowerStatus = ctypes.windll.kernel32.GetSystemPowerStatus
+GetSystemPowerStatus.argtypes = [ctypes.POINTER(SYSTEM_POWER_STATUS)]
+GetSystemPowerStatus.restype = wintypes.BOOL
+
+# Single struct reused across calls - the API just overwrites it
+_power_status = SYSTEM_POWER_STATUS()
+
+# WBEM enumerator flags for the WMI fallback query
+WBEM_FLAG_RETURN_IMMEDIATELY = 0x10
+WBEM_FLAG_FORWARD_ONLY = 0x20
+
+_tls = threading.local()
 
 def initialize_wmi():
-    """Initialize the WMI connection if not already initialized"""
-    global wmi_connection
-    if wmi_connection is None:
-        wmi_connection = wmi.WMI()
-    return wmi_connection
+    """
+    Get this thread's WMI services connection, creating it on first use.
 
-def get_battery_status():
-    """Get battery status using Windows Management Instrumentation (WMI)"""
-    try:
-        # Get a fresh WMI connection each time
-        conn = initialize_wmi()
-        batteries = conn.Win32_Battery()
-        if batteries:
-            battery = batteries[0]
-            percent = battery.EstimatedChargeRemaining
-            power_plugged = battery.BatteryStatus == 2  # 2 means AC power
+    COM objects are apartment-bound, so the connection lives in
+    thread-local storage and every thread initializes COM for itself
+    before connecting. That matters now that battery reads can run on
+    executor threads: sharing one connection across threads risks DCOM
+    apartment-mismatch hangs.
+    """
+    if getattr(_tls, "conn", None) is None:
+        import pythoncom
+        import win32com.client
+        pythoncom.CoInitializeEx(pythoncom.COINIT_MULTITHREADED)
+        _tls.conn = win32com.client.GetObject(r"winmgmts:root\cimv2")
+    return _tls.conn
+
+def close_wmi():
+    """Release this thread's WMI connection and uninitialize COM"""
+    if getattr(_tls, "conn", None) is not None:
+        _tls.conn = None
+        import pythoncom
+        pythoncom.CoUninitialize()
+
+def _get_battery_status_wmi():
+    """
+    Fallback battery read through the WMI Win32_Battery class.
+
+    Selects only the properties we need and asks for a forward-only,
+    return-immediately enumerator, so WMI neither materializes the ~40
+    unused CIM properties nor builds a scrollable result set.
+
+    Machines can expose several battery instances (ACPI plus HID plus
+    simulated ones, ~20 under MSBatteryClass with some docks); those are
+    aggregated into a capacity-weighted percentage, treating the system
+    as plugged in if any instance reports AC power.
+    """
+    conn = initialize_wmi()
+    result = conn.ExecQuery(
+        "SELECT EstimatedChargeRemaining, BatteryStatus, DesignCapacity"
+        " FROM Win32_Battery",
+        "WQL",
+        WBEM_FLAG_FORWARD_ONLY | WBEM_FLAG_RETURN_IMMEDIATELY,
+    )
+    batteries = list(result)
+    if not batteries:
+        return None, None
+
+    power_plugged = any(b.BatteryStatus == 2 for b in batteries)  # 2 means AC power
+    if len(batteries) == 1:
+        return batteries[0].EstimatedChargeRemaining, power_plugged
+
+    # Vectorized weighted mean; numpy is imported lazily since single
+    # battery machines never need it
+    import numpy as np
+    percent = np.fromiter(
+        (b.EstimatedChargeRemaining for b in batteries), dtype=np.int32)
+    capacity = np.fromiter(
+        (b.DesignCapacity or 1 for b in batteries), dtype=np.int64)
+    return int(round((percent * capacity).sum() / capacity.sum())), power_plugged
+
+def _get_battery_status_power():
+    """Battery read from the kernel summary via GetSystemPowerStatus"""
+    if GetSystemPowerStatus(ctypes.byref(_power_status)):
+        percent = _power_status.BatteryLifePercent
+        if percent != 255:  # 255 means battery status is unknown
+            power_plugged = _power_status.ACLineStatus == 1  # 1 means on AC power
             return percent, power_plugged
+    # API failed or could not see the battery - ask WMI instead
+    return _get_battery_status_wmi()
+
+class GUID(ctypes.Structure):
+    _fields_ = [
+        ("Data1", wintypes.DWORD),
+        ("Data2", wintypes.WORD),
+        ("Data3", wintypes.WORD),
+        ("Data4", ctypes.c_ubyte * 8),
+    ]
+
+    def __init__(self, data1, data2, data3, *data4):
+        super().__init__(data1, data2, data3, (ctypes.c_ubyte * 8)(*data4))
+
+# Battery class driver plumbing for the ioctl backend. These are the same
+# calls Windows itself makes to fill Win32_Battery, minus the WMI/CIM
+# translation layer, and they expose richer data (charge rate, capacities).
+GUID_DEVCLASS_BATTERY = GUID(
+    0x72631E54, 0x78A4, 0x11D0, 0xBC, 0xF7, 0x00, 0xAA, 0x00, 0xB7, 0xB3, 0x2A)
+
+DIGCF_PRESENT = 0x02
+DIGCF_DEVICEINTERFACE = 0x10
+GENERIC_READ = 0x80000000
+GENERIC_WRITE = 0x40000000
+FILE_SHARE_READ = 0x01
+FILE_SHARE_WRITE = 0x02
+OPEN_EXISTING = 3
+INVALID_HANDLE_VALUE = ctypes.c_void_p(-1).value
+
+IOCTL_BATTERY_QUERY_TAG = 0x294040
+IOCTL_BATTERY_QUERY_INFORMATION = 0x294044
+IOCTL_BATTERY_QUERY_STATUS = 0x29404C
+
+BATTERY_POWER_ON_LINE = 0x00000001  # PowerState flag
+BATTERY_INFORMATION_LEVEL = 0  # BatteryInformation in BATTERY_QUERY_INFORMATION_LEVEL
+
+class SP_DEVICE_INTERFACE_DATA(ctypes.Structure):
+    _fields_ = [
+        ("cbSize", wintypes.DWORD),
+        ("InterfaceClassGuid", GUID),
+        ("Flags", wintypes.DWORD),
+        ("Reserved", ctypes.c_void_p),  # ULONG_PTR
+    ]
+
+class BATTERY_QUERY_INFORMATION(ctypes.Structure):
+    _fields_ = [
+        ("BatteryTag", wintypes.ULONG),
+        ("InformationLevel", ctypes.c_int),
+        ("AtRate", wintypes.LONG),
+    ]
+
+class BATTERY_INFORMATION(ctypes.Structure):
+    _fields_ = [
+        ("Capabilities", wintypes.ULONG),
+        ("Technology", ctypes.c_ubyte),
+        ("Reserved", ctypes.c_ubyte * 3),
+        ("Chemistry", ctypes.c_ubyte * 4),
+        ("DesignedCapacity", wintypes.ULONG),
+        ("FullChargedCapacity", wintypes.ULONG),
+        ("DefaultAlert1", wintypes.ULONG),
+        ("DefaultAlert2", wintypes.ULONG),
+        ("CriticalBias", wintypes.ULONG),
+        ("CycleCount", wintypes.ULONG),
+    ]
+
+class BATTERY_WAIT_STATUS(ctypes.Structure):
+    _fields_ = [
+        ("BatteryTag", wintypes.ULONG),
+        ("Timeout", wintypes.ULONG),
+        ("PowerState", wintypes.ULONG),
+        ("LowCapacity", wintypes.ULONG),
+        ("HighCapacity", wintypes.ULONG),
+    ]
+
+class BATTERY_STATUS(ctypes.Structure):
+    _fields_ = [
+        ("PowerState", wintypes.ULONG),
+        ("Capacity", wintypes.ULONG),
+        ("Voltage", wintypes.ULONG),
+        ("Rate", wintypes.LONG),
+    ]
+
+# Handle, tag and full-charge capacity are cached across reads; a failed
+# ioctl clears the cache so the next read re-enumerates the battery
+_ioctl_battery = {"handle": None, "tag": None, "full_capacity": None}
+
+def _open_battery():
+    """Open the first battery exposed by the battery class driver.
+
+    Walks the device interfaces of GUID_DEVCLASS_BATTERY via SetupDi,
+    opens the device, queries its tag and caches FullChargedCapacity so
+    subsequent reads are a single DeviceIoControl round-trip.
+    """
+    setupapi = ctypes.windll.setupapi
+    kernel32 = ctypes.windll.kernel32
+    kernel32.CreateFileW.restype = wintypes.HANDLE
+
+    # HDEVINFO is a pointer: without these signatures ctypes would truncate
+    # it to a 32-bit int, breaking both the INVALID_HANDLE_VALUE check and
+    # the handle passed back into the later SetupDi calls on 64-bit
+    setupapi.SetupDiGetClassDevsW.restype = ctypes.c_void_p
+    setupapi.SetupDiGetClassDevsW.argtypes = [
+        ctypes.POINTER(GUID), wintypes.LPCWSTR, wintypes.HWND, wintypes.DWORD]
+    setupapi.SetupDiEnumDeviceInterfaces.argtypes = [
+        ctypes.c_void_p, ctypes.c_void_p, ctypes.POINTER(GUID), wintypes.DWORD,
+        ctypes.POINTER(SP_DEVICE_INTERFACE_DATA)]
+    setupapi.SetupDiGetDeviceInterfaceDetailW.argtypes = [
+        ctypes.c_void_p, ctypes.POINTER(SP_DEVICE_INTERFACE_DATA),
+        ctypes.c_void_p, wintypes.DWORD, ctypes.POINTER(wintypes.DWORD),
+        ctypes.c_void_p]
+    setupapi.SetupDiDestroyDeviceInfoList.argtypes = [ctypes.c_void_p]
+
+    hdev = setupapi.SetupDiGetClassDevsW(
+        ctypes.byref(GUID_DEVCLASS_BATTERY), None, None,
+        DIGCF_PRESENT | DIGCF_DEVICEINTERFACE)
+    if hdev == INVALID_HANDLE_VALUE:
+        return False
+    try:
+        interface_data = SP_DEVICE_INTERFACE_DATA()
+        interface_data.cbSize = ctypes.sizeof(SP_DEVICE_INTERFACE_DATA)
+        if not setupapi.SetupDiEnumDeviceInterfaces(
+                hdev, None, ctypes.byref(GUID_DEVCLASS_BATTERY), 0,
+                ctypes.byref(interface_data)):
+            return False
+
+        # First call reports the needed size, second fills the detail buffer
+        needed = wintypes.DWORD(0)
+        setupapi.SetupDiGetDeviceInterfaceDetailW(
+            hdev, ctypes.byref(interface_data), None, 0,
+            ctypes.byref(needed), None)
+        detail = ctypes.create_string_buffer(needed.value)
+        # cbSize of SP_DEVICE_INTERFACE_DETAIL_DATA_W: DWORD + one WCHAR,
+        # padded to pointer alignment on 64-bit
+        cbsize = 8 if ctypes.sizeof(ctypes.c_void_p) == 8 else 6
+        ctypes.cast(detail, ctypes.POINTER(wintypes.DWORD))[0] = cbsize
+        if not setupapi.SetupDiGetDeviceInterfaceDetailW(
+                hdev, ctypes.byref(interface_data), detail, needed,
+                None, None):
+            return False
+        device_path = ctypes.wstring_at(ctypes.addressof(detail) + 4)
+
+        handle = kernel32.CreateFileW(
+            device_path, GENERIC_READ | GENERIC_WRITE,
+            FILE_SHARE_READ | FILE_SHARE_WRITE, None, OPEN_EXISTING, 0, None)
+        if handle == INVALID_HANDLE_VALUE:
+            return False
+
+        returned = wintypes.DWORD(0)
+        timeout = wintypes.ULONG(0)
+        tag = wintypes.ULONG(0)
+        if not kernel32.DeviceIoControl(
+                handle, IOCTL_BATTERY_QUERY_TAG,
+                ctypes.byref(timeout), ctypes.sizeof(timeout),
+                ctypes.byref(tag), ctypes.sizeof(tag),
+                ctypes.byref(returned), None) or tag.value == 0:
+            kernel32.CloseHandle(handle)
+            return False
+
+        query = BATTERY_QUERY_INFORMATION(
+            BatteryTag=tag.value, InformationLevel=BATTERY_INFORMATION_LEVEL)
+        info = BATTERY_INFORMATION()
+        if not kernel32.DeviceIoControl(
+                handle, IOCTL_BATTERY_QUERY_INFORMATION,
+                ctypes.byref(query), ctypes.sizeof(query),
+                ctypes.byref(info), ctypes.sizeof(info),
+                ctypes.byref(returned), None):
+            kernel32.CloseHandle(handle)
+            return False
+
+        _ioctl_battery["handle"] = handle
+        _ioctl_battery["tag"] = tag.value
+        _ioctl_battery["full_capacity"] = info.FullChargedCapacity or 1
+        return True
+    finally:
+        setupapi.SetupDiDestroyDeviceInfoList(hdev)
+
+def _get_battery_status_ioctl():
+    """
+    Battery read straight from the battery class driver.
+
+    One user-to-kernel round-trip per read instead of the WMI provider
+    stack; percent is computed from Capacity against the cached
+    FullChargedCapacity and plugged state comes from PowerState.
+    """
+    if _ioctl_battery["handle"] is None and not _open_battery():
         return None, None
-    except Exception as e:
-        print(f"Error getting battery status: {e}")
+
+    kernel32 = ctypes.windll.kernel32
+    wait = BATTERY_WAIT_STATUS(BatteryTag=_ioctl_battery["tag"])
+    status = BATTERY_STATUS()
+    returned = wintypes.DWORD(0)
+    if not kernel32.DeviceIoControl(
+            _ioctl_battery["handle"], IOCTL_BATTERY_QUERY_STATUS,
+            ctypes.byref(wait), ctypes.sizeof(wait),
+            ctypes.byref(status), ctypes.sizeof(status),
+            ctypes.byref(returned), None):
+        # Tag went stale (battery removed, resume from sleep): drop the
+        # cached handle so the next read re-enumerates
+        kernel32.CloseHandle(_ioctl_battery["handle"])
+        _ioctl_battery.update(handle=None, tag=None, full_capacity=None)
         return None, None
 
-def notify(title, message, is_urgent=False):
-    """Show Windows 11 toast notification"""
-    notification = Notification(
+    percent = min(100, round(status.Capacity * 100 / _ioctl_battery["full_capacity"]))
+    power_plugged = bool(status.PowerState & BATTERY_POWER_ON_LINE)
+    return percent, power_plugged
+
+# Which low-level reader get_battery_status uses:
+#   power_status - GetSystemPowerStatus kernel summary (default)
+#   ioctl        - direct battery class driver reads
+#   wmi          - force the Win32_Battery fallback
+BACKEND = os.environ.get("BATWATCH_BACKEND", "power_status")
+
+_BACKENDS = {
+    "power_status": _get_battery_status_power,
+    "ioctl": _get_battery_status_ioctl,
+    "wmi": _get_battery_status_wmi,
+}
+
+def get_battery_status():
+    """Get battery status using the backend selected by BATWATCH_BACKEND"""
+    try:
+        return _BACKENDS[BACKEND]()
+    except Exception:
+        log.exception("Error getting battery status")
+        return None, None
+
+# Power-broadcast plumbing for event-driven monitoring
+WM_QUIT = 0x0012
+WM_POWERBROADCAST = 0x218
+PBT_POWERSETTINGCHANGE = 0x8013
+DEVICE_NOTIFY_WINDOW_HANDLE = 0
+HWND_MESSAGE = -3
+GWLP_WNDPROC = -4
+
+# Power setting GUIDs from winnt.h
+GUID_BATTERY_PERCENTAGE_REMAINING = GUID(
+    0xA7AD8041, 0xB45A, 0x4CAE, 0x87, 0xA3, 0xEE, 0xCB, 0xB4, 0x68, 0xA9, 0xE1)
+GUID_ACDC_POWER_SOURCE = GUID(
+    0x5D3E9A59, 0xE9D5, 0x4B00, 0xA6, 0xBD, 0xFF, 0x34, 0xFF, 0x51, 0x65, 0x48)
+
+class POWERBROADCAST_SETTING(ctypes.Structure):
+    """Payload attached to PBT_POWERSETTINGCHANGE messages"""
+    _fields_ = [
+        ("PowerSetting", GUID),
+        ("DataLength", wintypes.DWORD),
+        ("Data", ctypes.c_ubyte * 4),
+    ]
+
+LRESULT = ctypes.c_ssize_t
+WNDPROC = ctypes.WINFUNCTYPE(
+    LRESULT, wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM)
+
+# Thread id of the thread blocked in GetMessageW while the event-driven
+# pump runs; the console control handler posts WM_QUIT to it so shutdown
+# is not stuck waiting for the next power message
+_pump_thread_id = None
+
+def _seed_monitor_state():
+    """
+    Build the initial state for the event-driven monitor.
+
+    The power-setting GUIDs only fire on change, so the seed reading must
+    be run through the threshold check itself: starting already low (or
+    already full and plugged in) would otherwise never alert.
+    """
+    percent, power_plugged = get_battery_status()
+    state = {
+        "percent": percent,
+        "power_plugged": power_plugged,
+        "last_notification_type": None,
+    }
+    if percent is not None and power_plugged is not None:
+        status_text = "Plugged In" if power_plugged else "Not Plugged In"
+        log.info("Battery: %s%% (%s)", percent, status_text)
+        state["last_notification_type"] = check_thresholds(
+            percent, power_plugged, None)
+    return state
+
+def _handle_power_setting_change(lparam, state):
+    """Apply one PBT_POWERSETTINGCHANGE payload to the monitor state"""
+    setting = ctypes.cast(lparam, ctypes.POINTER(POWERBROADCAST_SETTING)).contents
+    value = int.from_bytes(bytes(setting.Data), "little")
+    if bytes(setting.PowerSetting) == bytes(GUID_BATTERY_PERCENTAGE_REMAINING):
+        state["percent"] = value
+    elif bytes(setting.PowerSetting) == bytes(GUID_ACDC_POWER_SOURCE):
+        state["power_plugged"] = value == 0  # 0 means AC power
+    else:
+        return
+
+    if state["percent"] is None or state["power_plugged"] is None:
+        return
+    status_text = "Plugged In" if state["power_plugged"] else "Not Plugged In"
+    log.info("Battery: %s%% (%s)", state["percent"], status_text)
+    state["last_notification_type"] = check_thresholds(
+        state["percent"], state["power_plugged"], state["last_notification_type"])
+
+def run_message_loop():
+    """
+    Monitor the battery event-driven instead of by polling.
+
+    Creates a hidden message-only window, subscribes it to battery-percentage
+    and AC/DC power-source changes, and pumps messages. Windows then delivers
+    WM_POWERBROADCAST only when something actually changed, so there are no
+    periodic wakeups and notifications are instant.
+
+    Returns True once the message loop has finished, or False if the window
+    could not be created or the notifications could not be registered
+    (caller should fall back to polling).
+    """
+    user32 = ctypes.windll.user32
+    user32.CreateWindowExW.restype = wintypes.HWND
+    user32.SetWindowLongPtrW.argtypes = [wintypes.HWND, ctypes.c_int, WNDPROC]
+    user32.SetWindowLongPtrW.restype = ctypes.c_void_p
+    user32.CallWindowProcW.argtypes = [
+        ctypes.c_void_p, wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM]
+    user32.CallWindowProcW.restype = LRESULT
+    # HPOWERNOTIFY is a pointer; without a restype a 64-bit handle would
+    # be truncated and NULL-checking it would be meaningless
+    user32.RegisterPowerSettingNotification.restype = ctypes.c_void_p
+    user32.RegisterPowerSettingNotification.argtypes = [
+        wintypes.HANDLE, ctypes.POINTER(GUID), wintypes.DWORD]
+
+    hwnd = user32.CreateWindowExW(
+        0, "STATIC", None, 0, 0, 0, 0, 0, HWND_MESSAGE, None, None, None)
+    if not hwnd:
+        return False
+
+    @WNDPROC
+    def wndproc(hwnd, msg, wparam, lparam):
+        if msg == WM_POWERBROADCAST and wparam == PBT_POWERSETTINGCHANGE:
+            try:
+                _handle_power_setting_change(lparam, state)
+            except Exception:
+                log.exception("Error handling power event")
+            return 0
+        return user32.CallWindowProcW(prev_wndproc, hwnd, msg, wparam, lparam)
+
+    prev_wndproc = user32.SetWindowLongPtrW(hwnd, GWLP_WNDPROC, wndproc)
+
+    for guid in (GUID_BATTERY_PERCENTAGE_REMAINING, GUID_ACDC_POWER_SOURCE):
+        if not user32.RegisterPowerSettingNotification(
+                hwnd, ctypes.byref(guid), DEVICE_NOTIFY_WINDOW_HANDLE):
+            # Without both subscriptions the pump would block forever
+            # receiving nothing; destroy the window and let the caller poll
+            log.warning("RegisterPowerSettingNotification failed")
+            user32.DestroyWindow(hwnd)
+            return False
+
+    # Seeded only once both subscriptions are in place, so a registration
+    # failure cannot alert here and then alert again from the polling loop
+    state = _seed_monitor_state()
+
+    global _pump_thread_id
+    _pump_thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+    try:
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+        return True
+    finally:
+        _pump_thread_id = None
+
+@functools.lru_cache(maxsize=1)
+def _get_templates():
+    """
+    Build the two toast templates on first use.
+
+    Importing winotify here instead of at module level keeps its XML/COM
+    machinery out of process startup; the lru_cache means the import and
+    the template construction happen at most once. app_id, duration and
+    the urgent-alert audio never change, so notify() only has to swap
+    title and message per call.
+    """
+    from winotify import Notification, audio
+
+    template = Notification(
         app_id="Battery Monitor",
-        title=title,
-        msg=message,
+        title="",
+        msg="",
         duration="short"  # "short" or "long"
     )
-    
-    # Add sound for urgent notifications
-    if is_urgent:
-        notification.set_audio(audio.Default, loop=False)
-    
+    urgent_template = Notification(
+        app_id="Battery Monitor",
+        title="",
+        msg="",
+        duration="short"
+    )
+    urgent_template.set_audio(audio.Default, loop=False)
+    return template, urgent_template
+
+# Debounce bookkeeping: alerts landing within _TOAST_DEBOUNCE_S of the
+# last shown toast are coalesced, newest wins, and a timer flushes the
+# survivor so the final alert always appears
+_TOAST_DEBOUNCE_S = 10.0
+_toast_lock = threading.Lock()
+_last_toast_time = 0.0
+_pending_toast = None
+_flush_timer = None
+
+def _show_toast(title, message, is_urgent):
+    template, urgent_template = _get_templates()
+    notification = urgent_template if is_urgent else template
+    notification.title = title
+    notification.msg = message
     notification.show()
 
-def prevent_sleep_during_notification():
-    """Prevent system from sleeping during notification"""
-    ctypes.windll.kernel32.SetThreadExecutionState(0x80000002)  # ES_SYSTEM_REQUIRED | ES_CONTINUOUS
+def _flush_pending_toast():
+    """Show whatever alert is still pending after the debounce window"""
+    global _pending_toast, _last_toast_time
+    with _toast_lock:
+        pending = _pending_toast
+        _pending_toast = None
+        if pending is None:
+            return
+        _last_toast_time = time.monotonic()
+    _show_toast(*pending)
 
-def allow_sleep():
-    """Allow system to sleep normally"""
-    ctypes.windll.kernel32.SetThreadExecutionState(0x80000000)  # ES_CONTINUOUS
+def notify(title, message, is_urgent=False):
+    """
+    Show Windows 11 toast notification.
 
-def main(test_mode=False, max_iterations=None):
+    Bursts are debounced: a reading flapping around a threshold can fire
+    several alerts per minute, and each toast pays the winotify dispatch
+    cost. Within the debounce window only the newest alert is kept and
+    shown once the window closes.
     """
-    Main function to monitor battery status
-    
+    global _pending_toast, _flush_timer, _last_toast_time
+    with _toast_lock:
+        now = time.monotonic()
+        if now - _last_toast_time >= _TOAST_DEBOUNCE_S and _pending_toast is None:
+            _last_toast_time = now
+            show_now = True
+        else:
+            _pending_toast = (title, message, is_urgent)
+            if _flush_timer is None or not _flush_timer.is_alive():
+                delay = max(0.0, _TOAST_DEBOUNCE_S - (now - _last_toast_time))
+                _flush_timer = threading.Timer(delay, _flush_pending_toast)
+                _flush_timer.daemon = True
+                _flush_timer.start()
+            show_now = False
+    if show_now:
+        _show_toast(title, message, is_urgent)
+
+ES_SYSTEM_REQUIRED = 0x00000001
+
+# Cached function pointer with fixed signature, so each call skips the
+# ctypes windll attribute lookup
+_SetThreadExecutionState = ctypes.windll.kernel32.SetThreadExecutionState
+_SetThreadExecutionState.argtypes = [ctypes.c_uint32]
+_SetThreadExecutionState.restype = ctypes.c_uint32
+
+def keep_system_awake():
+    """
+    Reset the system idle timer once so an imminent notification is seen.
+
+    Without ES_CONTINUOUS the request applies to this call only and
+    auto-clears, so there is no matching "allow sleep" call to forget
+    (or to skip if notify() throws).
+    """
+    _SetThreadExecutionState(ES_SYSTEM_REQUIRED)
+
+# Threshold dispatch built once at import. Three condition bits - below
+# low, at full, plugged in - form an index into an 8-entry table, so the
+# hot check is two comparisons folded into arithmetic plus one list load,
+# with no conditional branches to mispredict. An action tuple fires a
+# notification, None resets the notification state, and _KEEP leaves it
+# unchanged. Indexes 3 and 7 (below low and at full at once) cannot occur.
+_KEEP = object()  # sentinel for "no state change"
+
+_LOW_ACTION = ("low", "Low Battery", "Battery at {percent}%. Please connect charger.", True)
+_FULL_ACTION = ("full", "Battery Full", "Battery at {percent}%. You can disconnect charger.", False)
+
+_DISPATCH = [
+    None,          # 0: mid, on battery -> reset
+    _LOW_ACTION,   # 1: low, on battery -> alert
+    _KEEP,         # 2: full reading while on battery -> keep
+    _KEEP,         # 3: unreachable
+    None,          # 4: mid, plugged in -> reset
+    _KEEP,         # 5: low, plugged in -> keep
+    _FULL_ACTION,  # 6: full, plugged in -> alert
+    _KEEP,         # 7: unreachable
+]
+
+def check_thresholds(percent, power_plugged, last_notification_type):
+    """
+    Apply the low/full threshold logic to one battery reading.
+
+    Fires a notification when a threshold is crossed and returns the new
+    notification state ("low", "full", or None). Shared between the polling
+    loop and the power-broadcast event handler.
+    """
+    key = ((percent <= LOW_BATTERY_THRESHOLD)
+           | ((percent >= FULL_BATTERY_THRESHOLD) << 1)
+           | (int(power_plugged) << 2))
+    action = _DISPATCH[key]
+
+    if action is None:
+        # Between thresholds: reset so the next crossing alerts again
+        return None
+    if action is _KEEP:
+        return last_notification_type
+
+    notification_type, title, message, is_urgent = action
+    if notification_type != last_notification_type:
+        keep_system_awake()
+        notify(title, message.format(percent=percent), is_urgent=is_urgent)
+        last_notification_type = notification_type
+    return last_notification_type
+
+# Interruptible replacement for time.sleep in the polling loop. Anything
+# that needs the loop to react immediately (console Ctrl handler, power
+# event callbacks) can call _wakeup.set() to cut the current delay short.
+_wakeup = threading.Event()
+
+_HANDLER_ROUTINE = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.DWORD)
+
+@_HANDLER_ROUTINE
+def _console_ctrl_handler(ctrl_type):
+    # Wake the polling loop so Ctrl+C takes effect immediately; returning
+    # False leaves the default handler to raise KeyboardInterrupt as usual
+    _wakeup.set()
+    if _pump_thread_id is not None:
+        # Break the message pump too: a thread blocked in GetMessageW
+        # would otherwise hold up shutdown until the next power message
+        ctypes.windll.user32.PostThreadMessageW(_pump_thread_id, WM_QUIT, 0, 0)
+    return False
+
+def _interruptible_sleep(seconds):
+    """Sleep that _wakeup.set() can cut short"""
+    if _wakeup.wait(seconds):
+        _wakeup.clear()
+
+def compute_poll_interval(percent, power_plugged, prev_percent, prev_time, now):
+    """
+    Pick the next polling delay from the battery's recent slope.
+
+    Estimates the time until the relevant threshold from the last two
+    samples and sleeps half of it, clamped to [MIN_CHECK_INTERVAL,
+    MAX_CHECK_INTERVAL]. Polls less often when far from a threshold and
+    more often when close to one. Falls back to CHECK_INTERVAL when the
+    slope is flat, pointing away from the threshold, or unknown.
+    """
+    if prev_percent is None or now <= prev_time:
+        return CHECK_INTERVAL
+
+    dpdt = (percent - prev_percent) / (now - prev_time)  # percent per second
+
+    if not power_plugged and percent > LOW_BATTERY_THRESHOLD and dpdt < 0:
+        time_to_threshold = (percent - LOW_BATTERY_THRESHOLD) / -dpdt
+    elif power_plugged and percent < FULL_BATTERY_THRESHOLD and dpdt > 0:
+        time_to_threshold = (FULL_BATTERY_THRESHOLD - percent) / dpdt
+    else:
+        return CHECK_INTERVAL
+
+    return min(MAX_CHECK_INTERVAL, max(MIN_CHECK_INTERVAL, time_to_threshold / 2))
+
+def _main_sync(test_mode=False, max_iterations=None):
+    """
+    Synchronous battery monitor loop, kept for callers that cannot run an
+    event loop
+
     Args:
         test_mode: If True, enables test mode for unit testing
         max_iterations: Maximum number of loop iterations (for testing)
     """
     last_notification_type = None
     iteration_count = 0
-    
-    print("Battery monitor started. Press Ctrl+C to exit.")
-    print(f"Checking battery every {CHECK_INTERVAL//60} minutes.")
-    
+    prev_percent = None
+    prev_time = 0.0
+    last_status = (None, None)
+    interval = CHECK_INTERVAL
+
+    log.info("Battery monitor started. Press Ctrl+C to exit.")
+
+    # Prefer event-driven monitoring; fall back to polling if the
+    # message-only window cannot be set up (test mode always polls)
+    if not test_mode:
+        # Let Ctrl+C break a pending poll delay immediately
+        ctypes.windll.kernel32.SetConsoleCtrlHandler(_console_ctrl_handler, True)
+        try:
+            if run_message_loop():
+                return
+        except KeyboardInterrupt:
+            log.info("Battery monitor stopped.")
+            return
+        except Exception:
+            log.exception("Event-driven monitoring unavailable")
+        log.info("Falling back to polling.")
+
+    log.info("Checking battery every %s minutes.", CHECK_INTERVAL // 60)
+
     while True:
         try:
             # For testing, we can limit the number of iterations
@@ -80,52 +713,144 @@ def main(test_mode=False, max_iterations=None):
                     break
                     
             percent, power_plugged = get_battery_status()
-            
+
             if percent is None:
-                print("Could not get battery information")
+                log.warning("Could not get battery information")
                 if not test_mode:
-                    time.sleep(CHECK_INTERVAL)
+                    _interruptible_sleep(CHECK_INTERVAL)
                 continue
-                
+
+            # Skip the console write and the threshold re-check when nothing
+            # changed since the last tick - the common case, as the battery
+            # moves about 1% every ten minutes (test mode always processes).
+            # Keep sleeping the last slope-derived interval so an unchanged
+            # reading does not snap the cadence back to CHECK_INTERVAL
+            if not test_mode and (percent, power_plugged) == last_status:
+                _interruptible_sleep(interval)
+                continue
+            last_status = (percent, power_plugged)
+
             status_text = "Plugged In" if power_plugged else "Not Plugged In"
-            print(f"Battery: {percent}% ({status_text})")
-            
-            # Alert when battery is low and not charging
-            if percent <= LOW_BATTERY_THRESHOLD and not power_plugged and last_notification_type != "low":
-                prevent_sleep_during_notification()
-                notify(
-                    "Low Battery",
-                    f"Battery at {percent}%. Please connect charger.",
-                    is_urgent=True
-                )
-                last_notification_type = "low"
-                allow_sleep()
-                
-            # Alert when battery is full and still charging
-            elif percent >= FULL_BATTERY_THRESHOLD and power_plugged and last_notification_type != "full":
-                prevent_sleep_during_notification()
-                notify(
-                    "Battery Full",
-                    f"Battery at {percent}%. You can disconnect charger."
-                )
-                last_notification_type = "full"
-                allow_sleep()
-            
-            # Reset notification state when between thresholds
-            elif LOW_BATTERY_THRESHOLD < percent < FULL_BATTERY_THRESHOLD:
-                last_notification_type = None
-            
+            log.info("Battery: %s%% (%s)", percent, status_text)
+
+            last_notification_type = check_thresholds(
+                percent, power_plugged, last_notification_type)
+
+            now = time.monotonic()
+            interval = compute_poll_interval(
+                percent, power_plugged, prev_percent, prev_time, now)
+            prev_percent, prev_time = percent, now
+
             # Skip sleep in test mode
             if not test_mode:
-                time.sleep(CHECK_INTERVAL)
+                _interruptible_sleep(interval)
             
         except KeyboardInterrupt:
-            print("Battery monitor stopped.")
+            log.info("Battery monitor stopped.")
             break
-        except Exception as e:
-            print(f"Error: {e}")
+        except Exception:
+            log.exception("Error in monitor loop")
             if not test_mode:
-                time.sleep(CHECK_INTERVAL)
+                _interruptible_sleep(CHECK_INTERVAL)
+
+async def main_async(test_mode=False, max_iterations=None):
+    """
+    Monitor battery status on an asyncio event loop.
+
+    Same behavior as the synchronous loop, but delays are awaited and the
+    blocking pieces (the Win32 message pump and the battery reads, which
+    may hit WMI) run in the default executor, so other coroutines - future
+    watchers, a status endpoint - can share the loop.
+
+    Args:
+        test_mode: If True, enables test mode for unit testing
+        max_iterations: Maximum number of loop iterations (for testing)
+    """
+    loop = asyncio.get_running_loop()
+    last_notification_type = None
+    iteration_count = 0
+    prev_percent = None
+    prev_time = 0.0
+    last_status = (None, None)
+    interval = CHECK_INTERVAL
+
+    log.info("Battery monitor started. Press Ctrl+C to exit.")
+
+    # Prefer event-driven monitoring; fall back to polling if the
+    # message-only window cannot be set up (test mode always polls)
+    if not test_mode:
+        # Let Ctrl+C break a pending poll delay immediately
+        ctypes.windll.kernel32.SetConsoleCtrlHandler(_console_ctrl_handler, True)
+        try:
+            if await loop.run_in_executor(None, run_message_loop):
+                return
+        except KeyboardInterrupt:
+            log.info("Battery monitor stopped.")
+            return
+        except Exception:
+            log.exception("Event-driven monitoring unavailable")
+        log.info("Falling back to polling.")
+
+    log.info("Checking battery every %s minutes.", CHECK_INTERVAL // 60)
+
+    while True:
+        try:
+            # For testing, we can limit the number of iterations
+            if test_mode and max_iterations is not None:
+                iteration_count += 1
+                if iteration_count > max_iterations:
+                    break
+
+            percent, power_plugged = await loop.run_in_executor(
+                None, get_battery_status)
+
+            if percent is None:
+                log.warning("Could not get battery information")
+                if not test_mode:
+                    await asyncio.sleep(CHECK_INTERVAL)
+                continue
+
+            # Skip the console write and the threshold re-check when nothing
+            # changed since the last tick - the common case, as the battery
+            # moves about 1% every ten minutes (test mode always processes).
+            # Keep sleeping the last slope-derived interval so an unchanged
+            # reading does not snap the cadence back to CHECK_INTERVAL
+            if not test_mode and (percent, power_plugged) == last_status:
+                await asyncio.sleep(interval)
+                continue
+            last_status = (percent, power_plugged)
+
+            status_text = "Plugged In" if power_plugged else "Not Plugged In"
+            log.info("Battery: %s%% (%s)", percent, status_text)
+
+            last_notification_type = check_thresholds(
+                percent, power_plugged, last_notification_type)
+
+            now = time.monotonic()
+            interval = compute_poll_interval(
+                percent, power_plugged, prev_percent, prev_time, now)
+            prev_percent, prev_time = percent, now
+
+            # Skip sleep in test mode
+            if not test_mode:
+                await asyncio.sleep(interval)
+
+        except KeyboardInterrupt:
+            log.info("Battery monitor stopped.")
+            break
+        except Exception:
+            log.exception("Error in monitor loop")
+            if not test_mode:
+                await asyncio.sleep(CHECK_INTERVAL)
+
+def main(test_mode=False, max_iterations=None):
+    """Run the async monitor; kept as the entry point for compatibility"""
+    try:
+        asyncio.run(main_async(test_mode=test_mode, max_iterations=max_iterations))
+    except KeyboardInterrupt:
+        # An interactive Ctrl+C cancels the task and re-raises out of
+        # asyncio.run rather than inside the coroutine; exit cleanly here
+        log.info("Battery monitor stopped.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,147 +1,429 @@
+import asyncio
+import ctypes
+
 import pytest
+from types import SimpleNamespace
 from unittest.mock import patch, MagicMock
 import battery_watcher
 
 @pytest.fixture
-def mock_wmi():
-    """Fixture to mock WMI connection and battery objects"""
-    mock_battery = MagicMock()
-    mock_battery.EstimatedChargeRemaining = 75
-    mock_battery.BatteryStatus = 1  # Not plugged in
-    
-    mock_batteries = [mock_battery]
-    
-    # Create a mock WMI instance
-    mock_wmi_instance = MagicMock()
-    mock_wmi_instance.Win32_Battery.return_value = mock_batteries
-    
-    # Patch the initialize_wmi function to return our mock
-    with patch('battery_watcher.initialize_wmi', return_value=mock_wmi_instance):
-        yield mock_battery
+def mock_power_status():
+    """Fixture to mock the GetSystemPowerStatus Win32 call"""
+    # The API fills the module-level struct, so tests just set its fields
+    battery_watcher._power_status.BatteryLifePercent = 75
+    battery_watcher._power_status.ACLineStatus = 0  # Not plugged in
+
+    with patch('battery_watcher.GetSystemPowerStatus', return_value=1):
+        yield battery_watcher._power_status
 
 @pytest.fixture
 def mock_notification():
-    """Fixture to mock Windows notifications"""
-    with patch('battery_watcher.Notification') as mock_notif:
-        mock_notif_instance = MagicMock()
-        mock_notif.return_value = mock_notif_instance
-        yield mock_notif
+    """Fixture to mock the lazily built toast templates"""
+    # Reset the debounce state so every test starts outside the window
+    battery_watcher._last_toast_time = 0.0
+    battery_watcher._pending_toast = None
+    battery_watcher._flush_timer = None
+
+    mock_normal = MagicMock()
+    mock_urgent = MagicMock()
+    with patch('battery_watcher._get_templates', return_value=(mock_normal, mock_urgent)):
+        yield SimpleNamespace(normal=mock_normal, urgent=mock_urgent)
 
 @pytest.fixture
 def mock_sleep():
-    """Fixture to mock time.sleep to speed up tests"""
-    with patch('time.sleep'):
+    """Fixture to mock both sleep flavors to speed up tests"""
+    async def instant_sleep(delay):
+        return None
+
+    with patch.object(battery_watcher._wakeup, 'wait', return_value=False), \
+         patch('asyncio.sleep', new=instant_sleep):
         yield
 
 @pytest.fixture
 def mock_ctypes():
-    """Fixture to mock ctypes calls for sleep prevention"""
-    with patch('ctypes.windll.kernel32.SetThreadExecutionState'):
-        yield
+    """Fixture to mock the cached SetThreadExecutionState pointer"""
+    with patch('battery_watcher._SetThreadExecutionState') as mock_stes:
+        yield mock_stes
 
 class TestBatteryStatus:
-    def test_get_battery_status_normal(self, mock_wmi):
+    def test_get_battery_status_normal(self, mock_power_status):
         """Test getting battery status under normal conditions"""
-        # Set up the mock battery
-        mock_wmi.EstimatedChargeRemaining = 75
-        mock_wmi.BatteryStatus = 1  # Not plugged in
-        
+        # Set up the power status struct
+        mock_power_status.BatteryLifePercent = 75
+        mock_power_status.ACLineStatus = 0  # Not plugged in
+
         # Call the function
         percent, power_plugged = battery_watcher.get_battery_status()
-        
+
         # Assert the results
         assert percent == 75
         assert power_plugged is False
 
-    def test_get_battery_status_charging(self, mock_wmi):
+    def test_get_battery_status_charging(self, mock_power_status):
         """Test getting battery status when charging"""
-        # Set up the mock battery
-        mock_wmi.EstimatedChargeRemaining = 60
-        mock_wmi.BatteryStatus = 2  # Plugged in
-        
+        # Set up the power status struct
+        mock_power_status.BatteryLifePercent = 60
+        mock_power_status.ACLineStatus = 1  # Plugged in
+
         # Call the function
         percent, power_plugged = battery_watcher.get_battery_status()
-        
+
         # Assert the results
         assert percent == 60
         assert power_plugged is True
 
     def test_get_battery_status_exception(self):
         """Test handling of exceptions in get_battery_status"""
-        with patch('battery_watcher.initialize_wmi', side_effect=Exception("Test exception")):
+        with patch('battery_watcher.GetSystemPowerStatus', side_effect=Exception("Test exception")):
             percent, power_plugged = battery_watcher.get_battery_status()
             assert percent is None
             assert power_plugged is None
 
-    def test_get_battery_status_no_battery(self):
-        """Test when no battery is found"""
-        # Create a mock WMI instance with no batteries
-        mock_wmi_instance = MagicMock()
-        mock_wmi_instance.Win32_Battery.return_value = []  # Empty list, no batteries
-        
-        # Patch the initialize_wmi function
-        with patch('battery_watcher.initialize_wmi', return_value=mock_wmi_instance):
+    def test_get_battery_status_api_failure(self):
+        """Test that an API failure falls back to the WMI path"""
+        with patch('battery_watcher.GetSystemPowerStatus', return_value=0), \
+             patch('battery_watcher._get_battery_status_wmi', return_value=(None, None)) as mock_wmi:
             percent, power_plugged = battery_watcher.get_battery_status()
+            mock_wmi.assert_called_once()
             assert percent is None
             assert power_plugged is None
-            
-    def test_initialize_wmi(self):
-        """Test the initialize_wmi function"""
-        # Reset the global wmi_connection to None
-        battery_watcher.wmi_connection = None
-        
-        # Mock the wmi.WMI class
-        with patch('wmi.WMI') as mock_wmi:
-            # First call should create a new connection
-            conn1 = battery_watcher.initialize_wmi()
-            assert conn1 is not None
-            mock_wmi.assert_called_once()
-            
-            # Second call should reuse the existing connection
-            mock_wmi.reset_mock()
-            conn2 = battery_watcher.initialize_wmi()
-            assert conn2 is conn1
-            mock_wmi.assert_not_called()
+
+    def test_get_battery_status_no_battery(self, mock_power_status):
+        """Test when battery status is unknown (no battery present)"""
+        mock_power_status.BatteryLifePercent = 255  # Unknown status
+
+        with patch('battery_watcher._get_battery_status_wmi', return_value=(None, None)):
+            percent, power_plugged = battery_watcher.get_battery_status()
+            assert percent is None
+            assert power_plugged is None
+
+    def test_backend_switch(self):
+        """Test that BACKEND selects the reader used by get_battery_status"""
+        mock_reader = MagicMock(return_value=(42, True))
+
+        with patch.dict(battery_watcher._BACKENDS, {"ioctl": mock_reader}), \
+             patch('battery_watcher.BACKEND', "ioctl"):
+            percent, power_plugged = battery_watcher.get_battery_status()
+
+        mock_reader.assert_called_once()
+        assert percent == 42
+        assert power_plugged is True
+
+    def test_unknown_backend_handled(self):
+        """Test that a bad BACKEND value degrades to (None, None)"""
+        with patch('battery_watcher.BACKEND', "bogus"):
+            percent, power_plugged = battery_watcher.get_battery_status()
+            assert percent is None
+            assert power_plugged is None
+
+class TestWmiFallback:
+    def test_wmi_fallback_reads_battery(self):
+        """Test the WMI fallback path with a mocked connection"""
+        mock_battery = MagicMock()
+        mock_battery.EstimatedChargeRemaining = 65
+        mock_battery.BatteryStatus = 2  # Plugged in
+
+        mock_conn = MagicMock()
+        mock_conn.ExecQuery.return_value = [mock_battery]
+
+        with patch('battery_watcher.initialize_wmi', return_value=mock_conn):
+            percent, power_plugged = battery_watcher._get_battery_status_wmi()
+
+        assert percent == 65
+        assert power_plugged is True
+
+        # The query must project only the needed columns and use a
+        # forward-only, return-immediately enumerator
+        args, kwargs = mock_conn.ExecQuery.call_args
+        assert "SELECT EstimatedChargeRemaining, BatteryStatus, DesignCapacity" in args[0]
+        assert args[2] == (battery_watcher.WBEM_FLAG_FORWARD_ONLY
+                           | battery_watcher.WBEM_FLAG_RETURN_IMMEDIATELY)
+
+    def test_wmi_fallback_multiple_batteries(self):
+        """Test that multiple battery instances aggregate by capacity"""
+        big = MagicMock()
+        big.EstimatedChargeRemaining = 100
+        big.BatteryStatus = 1
+        big.DesignCapacity = 4000
+
+        small = MagicMock()
+        small.EstimatedChargeRemaining = 50
+        small.BatteryStatus = 2  # This one sees AC power
+        small.DesignCapacity = 2000
+
+        mock_conn = MagicMock()
+        mock_conn.ExecQuery.return_value = [big, small]
+
+        with patch('battery_watcher.initialize_wmi', return_value=mock_conn):
+            percent, power_plugged = battery_watcher._get_battery_status_wmi()
+
+        # (100 * 4000 + 50 * 2000) / 6000 rounds to 83
+        assert percent == 83
+        assert power_plugged is True
+
+    def test_wmi_fallback_no_battery(self):
+        """Test the WMI fallback when the query returns no rows"""
+        mock_conn = MagicMock()
+        mock_conn.ExecQuery.return_value = []
+
+        with patch('battery_watcher.initialize_wmi', return_value=mock_conn):
+            percent, power_plugged = battery_watcher._get_battery_status_wmi()
+
+        assert percent is None
+        assert power_plugged is None
+
+    def test_initialize_wmi_reuses_thread_connection(self):
+        """Test that the thread-local connection is reused on later calls"""
+        battery_watcher._tls.conn = MagicMock()
+
+        conn = battery_watcher.initialize_wmi()
+
+        assert conn is battery_watcher._tls.conn
+        battery_watcher._tls.conn = None
+
+    def test_close_wmi_releases_connection(self):
+        """Test that close_wmi drops the connection and uninitializes COM"""
+        battery_watcher._tls.conn = MagicMock()
+
+        with patch('pythoncom.CoUninitialize') as mock_uninit:
+            battery_watcher.close_wmi()
+
+        assert battery_watcher._tls.conn is None
+        mock_uninit.assert_called_once()
+
+class TestCheckThresholds:
+    def test_low_battery_fires_notification(self, mock_notification, mock_ctypes):
+        """Test that crossing the low threshold fires an urgent notification"""
+        result = battery_watcher.check_thresholds(40, False, None)
+
+        assert result == "low"
+        mock_notification.urgent.show.assert_called_once()
+        assert mock_notification.urgent.title == "Low Battery"
+
+    def test_low_battery_not_repeated(self, mock_notification, mock_ctypes):
+        """Test that the low notification is not repeated while state is 'low'"""
+        result = battery_watcher.check_thresholds(40, False, "low")
+
+        assert result == "low"
+        mock_notification.urgent.show.assert_not_called()
+        mock_notification.normal.show.assert_not_called()
+
+    def test_reset_between_thresholds(self, mock_notification, mock_ctypes):
+        """Test that notification state resets between thresholds"""
+        result = battery_watcher.check_thresholds(75, False, "low")
+
+        assert result is None
+        mock_notification.urgent.show.assert_not_called()
+        mock_notification.normal.show.assert_not_called()
+
+    def test_low_but_plugged_keeps_state(self, mock_notification, mock_ctypes):
+        """Test that plugging in below the low threshold keeps the state"""
+        result = battery_watcher.check_thresholds(40, True, "low")
+
+        assert result == "low"
+        mock_notification.urgent.show.assert_not_called()
+        mock_notification.normal.show.assert_not_called()
+
+    def test_full_battery_fires_notification(self, mock_notification, mock_ctypes):
+        """Test that reaching full while plugged in fires a plain notification"""
+        result = battery_watcher.check_thresholds(100, True, None)
+
+        assert result == "full"
+        mock_notification.normal.show.assert_called_once()
+        assert mock_notification.normal.title == "Battery Full"
+
+class TestWakeupEvent:
+    def test_console_ctrl_handler_sets_wakeup(self):
+        """Test that the console control handler wakes the polling loop"""
+        battery_watcher._wakeup.clear()
+        battery_watcher._console_ctrl_handler(0)  # CTRL_C_EVENT
+        assert battery_watcher._wakeup.is_set()
+        battery_watcher._wakeup.clear()
+
+    def test_console_ctrl_handler_breaks_message_pump(self):
+        """Test that Ctrl+C posts WM_QUIT to a running message pump"""
+        with patch('battery_watcher._pump_thread_id', 1234), \
+             patch.object(battery_watcher.ctypes.windll.user32,
+                          'PostThreadMessageW') as mock_post:
+            battery_watcher._console_ctrl_handler(0)  # CTRL_C_EVENT
+
+        mock_post.assert_called_once_with(1234, battery_watcher.WM_QUIT, 0, 0)
+        battery_watcher._wakeup.clear()
+
+    def test_interruptible_sleep_clears_wakeup(self):
+        """Test that a wakeup consumed by the sleep is cleared again"""
+        battery_watcher._wakeup.set()
+        battery_watcher._interruptible_sleep(0.01)
+        assert not battery_watcher._wakeup.is_set()
+
+class TestPollInterval:
+    def test_unknown_slope_uses_default(self):
+        """Test that the first sample falls back to CHECK_INTERVAL"""
+        interval = battery_watcher.compute_poll_interval(80, False, None, 0.0, 100.0)
+        assert interval == battery_watcher.CHECK_INTERVAL
+
+    def test_discharging_near_threshold_polls_sooner(self):
+        """Test that a fast discharge close to the low threshold shortens the delay"""
+        # 1% lost per 60s at 52%: ~120s to threshold, so sleep ~60s
+        interval = battery_watcher.compute_poll_interval(52, False, 53, 0.0, 60.0)
+        assert interval == pytest.approx(60)
+
+    def test_discharging_far_from_threshold_polls_later(self):
+        """Test that a slow discharge far from the threshold stretches the delay"""
+        # 1% lost per 600s at 95%: ~7.5h to threshold, capped at the maximum
+        interval = battery_watcher.compute_poll_interval(95, False, 96, 0.0, 600.0)
+        assert interval == battery_watcher.MAX_CHECK_INTERVAL
+
+    def test_charging_toward_full(self):
+        """Test the symmetric logic while charging toward the full threshold"""
+        # 1% gained per 60s at 98%: ~120s to threshold, so sleep ~60s
+        interval = battery_watcher.compute_poll_interval(98, True, 97, 0.0, 60.0)
+        assert interval == pytest.approx(60)
+
+    def test_minimum_interval_enforced(self):
+        """Test that very steep slopes never poll faster than the minimum"""
+        # 10% lost per 30s right above the threshold
+        interval = battery_watcher.compute_poll_interval(51, False, 61, 0.0, 30.0)
+        assert interval == battery_watcher.MIN_CHECK_INTERVAL
+
+    def test_flat_slope_uses_default(self):
+        """Test that an unchanged percentage falls back to CHECK_INTERVAL"""
+        interval = battery_watcher.compute_poll_interval(80, False, 80, 0.0, 60.0)
+        assert interval == battery_watcher.CHECK_INTERVAL
 
 class TestNotifications:
     def test_notify_normal(self, mock_notification):
         """Test normal notification without urgency"""
         battery_watcher.notify("Test Title", "Test Message")
-        
-        # Check if notification was created with correct parameters
-        mock_notification.assert_called_once()
-        mock_notification.return_value.show.assert_called_once()
-        assert not mock_notification.return_value.set_audio.called
-        
-        # Check the notification parameters
-        args, kwargs = mock_notification.call_args
-        assert kwargs['title'] == "Test Title"
-        assert kwargs['msg'] == "Test Message"
+
+        # The plain template is reused with the new title and message
+        mock_notification.normal.show.assert_called_once()
+        assert mock_notification.normal.title == "Test Title"
+        assert mock_notification.normal.msg == "Test Message"
+        mock_notification.urgent.show.assert_not_called()
 
     def test_notify_urgent(self, mock_notification):
         """Test urgent notification with sound"""
         battery_watcher.notify("Test Title", "Test Message", is_urgent=True)
-        
-        # Check if notification was created with correct parameters and sound
-        mock_notification.assert_called_once()
-        mock_notification.return_value.show.assert_called_once()
-        mock_notification.return_value.set_audio.assert_called_once()
-        
-        # Check the notification parameters
-        args, kwargs = mock_notification.call_args
-        assert kwargs['title'] == "Test Title"
-        assert kwargs['msg'] == "Test Message"
 
-class TestSleepPrevention:
-    def test_prevent_sleep(self, mock_ctypes):
-        """Test that prevent_sleep_during_notification calls the correct Windows API"""
-        battery_watcher.prevent_sleep_during_notification()
-        battery_watcher.ctypes.windll.kernel32.SetThreadExecutionState.assert_called_once_with(0x80000002)
+        # The urgent template already carries the audio, so notify()
+        # must not call set_audio again
+        mock_notification.urgent.show.assert_called_once()
+        assert mock_notification.urgent.title == "Test Title"
+        assert mock_notification.urgent.msg == "Test Message"
+        assert not mock_notification.urgent.set_audio.called
+        mock_notification.normal.show.assert_not_called()
+
+class TestPowerEvents:
+    @staticmethod
+    def _make_setting(guid, value):
+        """Build a POWERBROADCAST_SETTING with a 4-byte integer payload"""
+        setting = battery_watcher.POWERBROADCAST_SETTING()
+        setting.PowerSetting = guid
+        setting.DataLength = 4
+        setting.Data = (ctypes.c_ubyte * 4)(*value.to_bytes(4, "little"))
+        return setting
+
+    def test_percent_event_updates_state_and_alerts(self, mock_notification, mock_ctypes):
+        """Test that a battery-percentage event feeds the threshold check"""
+        state = {"percent": 60, "power_plugged": False, "last_notification_type": None}
+        setting = self._make_setting(
+            battery_watcher.GUID_BATTERY_PERCENTAGE_REMAINING, 45)
+
+        battery_watcher._handle_power_setting_change(
+            ctypes.addressof(setting), state)
+
+        assert state["percent"] == 45
+        assert state["last_notification_type"] == "low"
+        mock_notification.urgent.show.assert_called_once()
+
+    def test_power_source_event_updates_state(self, mock_notification, mock_ctypes):
+        """Test that an AC/DC event updates plugged state and alerts"""
+        state = {"percent": 100, "power_plugged": False, "last_notification_type": None}
+        setting = self._make_setting(
+            battery_watcher.GUID_ACDC_POWER_SOURCE, 0)  # 0 means AC power
+
+        battery_watcher._handle_power_setting_change(
+            ctypes.addressof(setting), state)
+
+        assert state["power_plugged"] is True
+        assert state["last_notification_type"] == "full"
+        mock_notification.normal.show.assert_called_once()
+
+    def test_unknown_setting_is_ignored(self, mock_notification, mock_ctypes):
+        """Test that an unrelated power setting leaves the state alone"""
+        state = {"percent": 60, "power_plugged": False, "last_notification_type": None}
+        unknown = battery_watcher.GUID(0x12345678, 0x1234, 0x1234,
+                                       0, 1, 2, 3, 4, 5, 6, 7)
+        setting = self._make_setting(unknown, 1)
+
+        battery_watcher._handle_power_setting_change(
+            ctypes.addressof(setting), state)
+
+        assert state == {"percent": 60, "power_plugged": False,
+                         "last_notification_type": None}
+        mock_notification.normal.show.assert_not_called()
+        mock_notification.urgent.show.assert_not_called()
+
+    @patch('battery_watcher.get_battery_status')
+    def test_seed_state_alerts_immediately(self, mock_get_status, mock_notification, mock_ctypes):
+        """Test that starting already below the low threshold alerts at seed time"""
+        mock_get_status.return_value = (40, False)
+
+        state = battery_watcher._seed_monitor_state()
+
+        assert state["percent"] == 40
+        assert state["last_notification_type"] == "low"
+        mock_notification.urgent.show.assert_called_once()
+
+    @patch('battery_watcher.get_battery_status')
+    def test_seed_state_without_battery_info(self, mock_get_status, mock_notification):
+        """Test that a failed seed read leaves the state empty without alerting"""
+        mock_get_status.return_value = (None, None)
+
+        state = battery_watcher._seed_monitor_state()
 
-    def test_allow_sleep(self, mock_ctypes):
-        """Test that allow_sleep calls the correct Windows API"""
-        battery_watcher.allow_sleep()
-        battery_watcher.ctypes.windll.kernel32.SetThreadExecutionState.assert_called_once_with(0x80000000)
+        assert state["last_notification_type"] is None
+        mock_notification.normal.show.assert_not_called()
+        mock_notification.urgent.show.assert_not_called()
+
+class TestNotificationDebounce:
+    def test_burst_keeps_newest_alert(self, mock_notification):
+        """Test that alerts inside the debounce window collapse to the newest"""
+        battery_watcher.notify("First", "shown immediately")
+
+        with patch('threading.Timer') as mock_timer:
+            battery_watcher.notify("Second", "coalesced away")
+            battery_watcher.notify("Third", "survives")
+
+        # Only the first toast was shown; one timer covers the burst
+        assert mock_notification.normal.show.call_count == 1
+        assert mock_notification.normal.title == "First"
+        assert battery_watcher._pending_toast == ("Third", "survives", False)
+        mock_timer.assert_called_once()
+
+    def test_flush_shows_pending_alert(self, mock_notification):
+        """Test that the timer flush shows the surviving alert"""
+        battery_watcher._pending_toast = ("Late", "flushed by timer", True)
+
+        battery_watcher._flush_pending_toast()
+
+        mock_notification.urgent.show.assert_called_once()
+        assert mock_notification.urgent.title == "Late"
+        assert battery_watcher._pending_toast is None
+
+    def test_flush_without_pending_is_noop(self, mock_notification):
+        """Test that a flush with nothing pending shows nothing"""
+        battery_watcher._flush_pending_toast()
+
+        mock_notification.normal.show.assert_not_called()
+        mock_notification.urgent.show.assert_not_called()
+
+class TestSleepPrevention:
+    def test_keep_system_awake(self, mock_ctypes):
+        """Test that keep_system_awake issues a one-shot ES_SYSTEM_REQUIRED"""
+        battery_watcher.keep_system_awake()
+        mock_ctypes.assert_called_once_with(battery_watcher.ES_SYSTEM_REQUIRED)
 
 class TestMainFunction:
     @patch('battery_watcher.get_battery_status')
@@ -153,12 +435,11 @@ class TestMainFunction:
         
         # Run the main function in test mode with just 1 iteration
         battery_watcher.main(test_mode=True, max_iterations=1)
-        
-        # Check if notification was created with correct parameters
-        mock_notification.assert_called_once()
-        args, kwargs = mock_notification.call_args
-        assert kwargs['title'] == "Low Battery"
-        assert f"Battery at {battery_level}%" in kwargs['msg']
+
+        # Check if the urgent toast was shown with correct parameters
+        mock_notification.urgent.show.assert_called_once()
+        assert mock_notification.urgent.title == "Low Battery"
+        assert f"Battery at {battery_level}%" in mock_notification.urgent.msg
 
     @patch('battery_watcher.get_battery_status')
     def test_main_full_battery(self, mock_get_status, mock_notification, mock_sleep, mock_ctypes):
@@ -169,12 +450,11 @@ class TestMainFunction:
         
         # Run the main function in test mode with just 1 iteration
         battery_watcher.main(test_mode=True, max_iterations=1)
-        
-        # Check if notification was created with correct parameters
-        mock_notification.assert_called_once()
-        args, kwargs = mock_notification.call_args
-        assert kwargs['title'] == "Battery Full"
-        assert f"Battery at {battery_level}%" in kwargs['msg']
+
+        # Check if the toast was shown with correct parameters
+        mock_notification.normal.show.assert_called_once()
+        assert mock_notification.normal.title == "Battery Full"
+        assert f"Battery at {battery_level}%" in mock_notification.normal.msg
 
     @patch('battery_watcher.get_battery_status')
     def test_main_normal_battery(self, mock_get_status, mock_notification, mock_sleep):
@@ -184,9 +464,10 @@ class TestMainFunction:
         
         # Run the main function in test mode with just 1 iteration
         battery_watcher.main(test_mode=True, max_iterations=1)
-        
+
         # Check that no notification was shown
-        mock_notification.assert_not_called()
+        mock_notification.normal.show.assert_not_called()
+        mock_notification.urgent.show.assert_not_called()
 
     @patch('battery_watcher.get_battery_status')
     def test_main_exception_handling(self, mock_get_status, mock_sleep):
@@ -207,10 +488,11 @@ class TestMainFunction:
         
         # Run the main function in test mode with just 1 iteration
         battery_watcher.main(test_mode=True, max_iterations=1)
-        
+
         # Check that no notification was shown
-        mock_notification.assert_not_called()
-        
+        mock_notification.normal.show.assert_not_called()
+        mock_notification.urgent.show.assert_not_called()
+
     @patch('battery_watcher.get_battery_status')
     def test_main_reset_notification_state(self, mock_get_status, mock_notification, mock_sleep):
         """Test that notification state is reset when battery level is between thresholds"""
@@ -222,10 +504,32 @@ class TestMainFunction:
         
         # Run the main function in test mode with 2 iterations
         battery_watcher.main(test_mode=True, max_iterations=2)
-        
+
         # Check that notification was shown once
-        assert mock_notification.call_count == 1
+        assert mock_notification.urgent.show.call_count == 1
+        mock_notification.normal.show.assert_not_called()
         
+    @patch('battery_watcher.get_battery_status')
+    def test_main_async_directly(self, mock_get_status, mock_notification, mock_sleep, mock_ctypes):
+        """Test that the async monitor can be awaited directly"""
+        battery_level = battery_watcher.LOW_BATTERY_THRESHOLD - 1
+        mock_get_status.return_value = (battery_level, False)
+
+        asyncio.run(battery_watcher.main_async(test_mode=True, max_iterations=1))
+
+        mock_notification.urgent.show.assert_called_once()
+        assert mock_notification.urgent.title == "Low Battery"
+
+    @patch('battery_watcher.get_battery_status')
+    def test_main_sync_fallback(self, mock_get_status, mock_notification, mock_sleep, mock_ctypes):
+        """Test that the synchronous loop is still available for old callers"""
+        mock_get_status.return_value = (75, True)  # Normal level, plugged in
+
+        battery_watcher._main_sync(test_mode=True, max_iterations=1)
+
+        mock_notification.normal.show.assert_not_called()
+        mock_notification.urgent.show.assert_not_called()
+
     @patch('battery_watcher.get_battery_status')
     def test_main_keyboard_interrupt(self, mock_get_status):
         """Test that KeyboardInterrupt is handled properly"""